@@ -6,7 +6,9 @@ import traceback
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import shutil
-import time
+import subprocess
+import zipfile
+from collections import OrderedDict
 from datetime import datetime
 
 # Attempt to import PIL for image display; fall back to os.startfile for viewing images
@@ -18,18 +20,38 @@ except Exception:
 
 # Import pipeline functions from your project (assumes same folder)
 from regex_parser import to_postfix
-from thompson_nfa import build_from_postfix, NFA
-from subset_dfa import nfa_to_dfa, DFA
-from minimizer import hopcroft_minimize
-from visualize import draw_nfa, draw_dfa, draw_min_dfa
+from thompson_nfa import build_from_postfix
+from pipeline import compile_pipeline, simulate, render_all_cached, PipelineError
+from lazy_dfa import LazyDFA
+from visualize import nfa_dot, dfa_dot, min_dfa_dot, draw_all
 from table_formatter import (
     TableFormatter, create_nfa_table, create_dfa_table,
-    create_minimized_dfa_table, MinimizationSteps, StringSimulation
+    create_minimized_dfa_table, MinimizationSteps
 )
 
 DIAGRAM_DIR = 'diagrams'
 os.makedirs(DIAGRAM_DIR, exist_ok=True)
 
+IMAGE_CACHE_SIZE = 5  # max decoded images / thumbnails kept in memory
+THUMB_SIZE = (420, 320)  # default thumbnail size (width, height)
+LOG_FLUSH_MS = 50     # how often queued log lines are written to the text widget
+LOG_QUEUE_MAX = 1000  # pending lines before they are merged into a single entry
+
+# external viewer, resolved once (None if unavailable)
+_XDG_OPEN = shutil.which('xdg-open') if os.name == 'posix' else None
+
+
+def open_external(path):
+    """Open path with the OS default application without waiting; False if none is known"""
+    if os.name == 'nt':
+        os.startfile(path)
+        return True
+    if _XDG_OPEN is None:
+        return False
+    subprocess.Popen([_XDG_OPEN, path], stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    return True
+
 # default regex from your project (Group 12)
 DEFAULT_REGEX = "ggh + m(pg + gg + ggg)*m + hg"
 DEFAULT_TEST = "ggh"
@@ -40,7 +62,19 @@ class App(tk.Tk):
         self.title("TOA Project - GUI (Separate)")
         self.geometry("1200x760")
         self._img_refs = {}  # keep references to PhotoImage objects
-        self._thumb_size = (420, 320)  # default thumbnail size (width, height)
+        self._thumb_size = THUMB_SIZE
+        # set by zoom_image; only a zoomed-in view may upscale diagrams past native size
+        self._zoomed = False
+        self._lazy = None  # (regex, LazyDFA) reused by "Simulate Only"
+        # result of the last full run; reused when only the test string changes
+        self._last_regex = None
+        self._last_min_dfa = None
+        # LRU image caches, entries invalidated when the PNG's mtime changes
+        self._pil_cache = OrderedDict()    # path -> (mtime, decoded RGBA Image)
+        self._thumb_cache = OrderedDict()  # (path, size, viewport) -> (mtime, PhotoImage)
+        self._img_lock = threading.Lock()  # caches are touched from worker and Tk threads
+        # last known size of each image label, updated on the Tk thread (None = not mapped yet)
+        self._viewports = {}
 
         # Top frame: inputs + control buttons
         top = ttk.Frame(self)
@@ -56,6 +90,13 @@ class App(tk.Tk):
         self.test_entry = ttk.Entry(top, textvariable=self.test_var, width=30)
         self.test_entry.grid(row=1, column=1, padx=6, sticky='w')
 
+        btn_sim = ttk.Button(top, text="Simulate Only", command=self.simulate_only_threaded)
+        btn_sim.grid(row=1, column=2, padx=6, sticky='w')
+
+        self.force_var = tk.BooleanVar(value=False)
+        chk_force = ttk.Checkbutton(top, text="Force rebuild", variable=self.force_var)
+        chk_force.grid(row=1, column=3, padx=6, sticky='w')
+
         btn_run = ttk.Button(top, text="Run Pipeline", command=self.run_pipeline_threaded)
         btn_run.grid(row=0, column=5, padx=6, rowspan=1, sticky='n')
 
@@ -125,21 +166,56 @@ class App(tk.Tk):
 
             lbl = ttk.Label(container, text=f"No {name}.png yet", anchor='center')
             lbl.pack(fill='both', expand=True, padx=8, pady=8)
+            lbl.bind('<Configure>', lambda e, n=name: self._on_label_configure(n, e))
             self.image_labels[name] = lbl
+            self._viewports[name] = None
 
         # status bar
         self.status = ttk.Label(self, text="Ready", relief='sunken', anchor='w')
         self.status.pack(side='bottom', fill='x')
 
+        # log lines are queued and written to self.text in batches
+        self._log_queue = []
+        self._log_clear = False  # set by _reset_log, the delete itself happens in _flush_log
+        self._log_lock = threading.Lock()
+        self.after(LOG_FLUSH_MS, self._flush_log_loop)
+
     # -------------------------
     # Utility and UI functions
     # -------------------------
     def log(self, msg):
-        self.text.insert('end', msg + '\n')
-        self.text.see('end')
+        # queue only; _flush_log does one insert per batch on the Tk thread
+        with self._log_lock:
+            self._log_queue.append(msg)
+            if len(self._log_queue) > LOG_QUEUE_MAX:
+                self._log_queue = ['\n'.join(self._log_queue)]
+
+    def _flush_log(self):
+        with self._log_lock:
+            batch, self._log_queue = self._log_queue, []
+            clear, self._log_clear = self._log_clear, False
+        if clear:
+            self.text.delete('1.0', 'end')
+        if batch:
+            self.text.insert('end', '\n'.join(batch) + '\n')
+            self.text.see('end')
+
+    def _flush_log_loop(self):
+        self._flush_log()
+        self.after(LOG_FLUSH_MS, self._flush_log_loop)
+
+    def _reset_log(self):
+        # may run on the worker thread: drop pending lines and let the Tk thread do the
+        # delete in the same batch as the inserts, so lines logged after this survive it
+        with self._log_lock:
+            self._log_queue = []
+            self._log_clear = True
+        self.after(0, self._flush_log)
 
     def clear_output(self):
-        self.text.delete('1.0', 'end')
+        self._reset_log()
+        # the tables are gone, so the next run must log them again even for the same regex
+        self._last_regex = self._last_min_dfa = None
         self.set_status("Output cleared")
 
     def set_status(self, s):
@@ -149,12 +225,7 @@ class App(tk.Tk):
     def open_diagram_folder(self):
         path = os.path.abspath(DIAGRAM_DIR)
         try:
-            if os.name == 'nt':
-                os.startfile(path)
-            elif os.name == 'posix':
-                import subprocess
-                subprocess.run(['xdg-open', path])
-            else:
+            if not open_external(path):
                 messagebox.showinfo("Open folder", f"Open the folder manually: {path}")
         except Exception as e:
             messagebox.showerror("Error", f"Cannot open folder: {e}")
@@ -187,6 +258,7 @@ class App(tk.Tk):
         if not fn:
             return
         try:
+            self._flush_log()
             content = self.text.get('1.0', 'end')
             with open(fn, 'w', encoding='utf-8') as f:
                 f.write(content)
@@ -200,22 +272,14 @@ class App(tk.Tk):
         if not fn:
             return
         try:
-            tmpdir = os.path.join(DIAGRAM_DIR, f"export_{int(time.time())}")
-            os.makedirs(tmpdir, exist_ok=True)
-            # save report.txt
-            report_path = os.path.join(tmpdir, "report.txt")
-            with open(report_path, 'w', encoding='utf-8') as r:
-                r.write(self.text.get('1.0', 'end'))
-            # copy diagrams
-            for name in ('nfa','dfa','min_dfa'):
-                src = os.path.join(DIAGRAM_DIR, f"{name}.png")
-                if os.path.exists(src):
-                    shutil.copy2(src, tmpdir)
-            # create zip
-            base = os.path.splitext(fn)[0]
-            shutil.make_archive(base, 'zip', tmpdir)
-            # remove tmpdir
-            shutil.rmtree(tmpdir)
+            self._flush_log()
+            # stream report and diagrams straight into the archive (no temp copies)
+            with zipfile.ZipFile(fn, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                zf.writestr("report.txt", self.text.get('1.0', 'end'))
+                for name in ('nfa','dfa','min_dfa'):
+                    src = os.path.join(DIAGRAM_DIR, f"{name}.png")
+                    if os.path.exists(src):
+                        zf.write(src, f"{name}.png")
             self.set_status(f"Exported ZIP to {os.path.basename(fn)}")
             messagebox.showinfo("Exported", f"ZIP saved: {fn}")
         except Exception as e:
@@ -226,6 +290,8 @@ class App(tk.Tk):
             "This GUI runs the RE -> NFA -> DFA -> Minimize pipeline.\n\n"
             "Buttons:\n"
             "- Run Pipeline: execute the pipeline and display results\n"
+            "- Simulate Only: test the string with a lazy DFA (no tables or diagrams)\n"
+            "- Force rebuild: rerun every stage and redraw diagrams even if the RE is unchanged\n"
             "- Open Diagrams Folder: open the diagrams/ folder\n"
             "- Load/Save Regex: load or save RE text files\n"
             "- Clear Output: clears the textual output area\n"
@@ -242,6 +308,42 @@ class App(tk.Tk):
         t = threading.Thread(target=self.run_pipeline, daemon=True)
         t.start()
 
+    def simulate_only_threaded(self):
+        t = threading.Thread(target=self.simulate_only, daemon=True)
+        t.start()
+
+    def simulate_only(self):
+        # match the test string without subset construction, minimization or rendering
+        regex = self.re_var.get().strip()
+        test = self.test_var.get().strip()
+
+        if not regex:
+            messagebox.showwarning("Input required", "Please enter a regular expression.")
+            return
+
+        self.set_status("Simulating...")
+        try:
+            if self._lazy is None or self._lazy[0] != regex:
+                self._lazy = (regex, LazyDFA(build_from_postfix(to_postfix(regex))))
+            lazy = self._lazy[1]
+            if test:
+                result = "Accepted" if lazy.accepts(test) else "Rejected"
+            else:
+                result = "Rejected (empty input)"
+        except Exception as e:
+            self.log(TableFormatter.format_error_message(f"Simulation failed: {str(e)}"))
+            self.log(traceback.format_exc())
+            self.set_status("Error")
+            return
+
+        self.log(TableFormatter.format_section_header("STRING SIMULATION (LAZY DFA)"))
+        self.log(f"Input: '{test}'")
+        self.log(f"Result: {result}")
+        self.log(TableFormatter.format_info_message(
+            f"{len(lazy.sets)} DFA states materialized" + (" (cache full)" if lazy.frozen else "")
+        ))
+        self.set_status("Done")
+
     def safe_call(self, fn, *a, **kw):
         try:
             return fn(*a, **kw)
@@ -252,28 +354,54 @@ class App(tk.Tk):
 
     def run_pipeline(self):
         self.set_status("Running pipeline...")
-        self.text.delete('1.0', 'end')
         regex = self.re_var.get().strip()
         test = self.test_var.get().strip()
+        force = self.force_var.get()
 
         if not regex:
             messagebox.showwarning("Input required", "Please enter a regular expression.")
             self.set_status("Idle")
             return
 
-        # 1) postfix conversion
+        if not force and regex == self._last_regex and self._last_min_dfa is not None:
+            # only the test string changed: keep tables and diagrams, just simulate again
+            self.log(TableFormatter.format_info_message(
+                "Regular expression unchanged, reusing the minimized DFA"
+            ))
+            self._log_simulation(self._last_min_dfa, test)
+            self.set_status("Done")
+            return
+
+        self._reset_log()
+        self._last_regex = self._last_min_dfa = None
+        if force:
+            compile_pipeline.cache_clear()
+
+        # 1) postfix conversion + automata compilation (cached per regex string)
         try:
-            postfix = to_postfix(regex)
-            self.log(TableFormatter.format_pipeline_start(regex, postfix))
-        except Exception as e:
-            self.log(TableFormatter.format_error_message(f"Regex parsing failed: {str(e)}"))
+            artifacts = compile_pipeline(regex)
+            self.log(TableFormatter.format_pipeline_start(regex, artifacts.postfix))
+        except PipelineError as e:
+            self.log(TableFormatter.format_error_message(f"{e.stage} failed: {str(e.cause)}"))
             self.log(traceback.format_exc())
             self.set_status("Error")
             return
 
+        # render all three diagrams in one batch so the dot runs overlap
+        # one result per diagram, so a failed render only blanks its own tab
+        try:
+            errors = render_all_cached(draw_all, [
+                ("NFA", lambda: nfa_dot(artifacts.nfa), os.path.join(DIAGRAM_DIR, 'nfa')),
+                ("DFA", lambda: dfa_dot(artifacts.dfa), os.path.join(DIAGRAM_DIR, 'dfa')),
+                ("Minimized DFA", lambda: min_dfa_dot(artifacts.min_dfa), os.path.join(DIAGRAM_DIR, 'min_dfa')),
+            ], regex, force=force)
+        except Exception as e:
+            errors = [e] * 3
+        diagram_errors = dict(zip(('nfa', 'dfa', 'min_dfa'), errors))
+
         # 2) build NFA
         try:
-            nfa = build_from_postfix(postfix)
+            nfa = artifacts.nfa
             self.log(TableFormatter.format_section_header("STEP 1: THOMPSON NFA CONSTRUCTION"))
             nfa_table = create_nfa_table(nfa)
             self.log(nfa_table.to_formatted_string())
@@ -286,20 +414,12 @@ class App(tk.Tk):
             self.set_status("Error")
             return
 
-        # render NFA
-        try:
-            draw_nfa(nfa, filename=os.path.join(DIAGRAM_DIR, 'nfa'))
-            self.log(TableFormatter.format_info_message(
-                f"NFA diagram saved: {os.path.join(DIAGRAM_DIR, 'nfa.png')}"
-            ))
-            self.display_image_safe('nfa', os.path.join(DIAGRAM_DIR, 'nfa.png'))
-        except Exception as e:
-            self.log(TableFormatter.format_error_message(f"NFA diagram rendering failed: {str(e)}"))
-            self.log(traceback.format_exc())
+        # show NFA diagram
+        self._show_diagram('nfa', "NFA", diagram_errors['nfa'])
 
         # 3) convert to DFA
         try:
-            dfa = nfa_to_dfa(nfa)
+            dfa = artifacts.dfa
             self.log(TableFormatter.format_section_header("STEP 2: SUBSET CONSTRUCTION (DFA)"))
             dfa_table = create_dfa_table(dfa)
             self.log(dfa_table.to_formatted_string())
@@ -312,20 +432,12 @@ class App(tk.Tk):
             self.set_status("Error")
             return
 
-        # render DFA
-        try:
-            draw_dfa(dfa, filename=os.path.join(DIAGRAM_DIR, 'dfa'))
-            self.log(TableFormatter.format_info_message(
-                f"DFA diagram saved: {os.path.join(DIAGRAM_DIR, 'dfa.png')}"
-            ))
-            self.display_image_safe('dfa', os.path.join(DIAGRAM_DIR, 'dfa.png'))
-        except Exception as e:
-            self.log(TableFormatter.format_error_message(f"DFA diagram rendering failed: {str(e)}"))
-            self.log(traceback.format_exc())
+        # show DFA diagram
+        self._show_diagram('dfa', "DFA", diagram_errors['dfa'])
 
         # 4) minimize DFA using Hopcroft's algorithm
         try:
-            min_dfa, steps = hopcroft_minimize(dfa)
+            min_dfa, steps = artifacts.min_dfa, artifacts.steps
             self.log(TableFormatter.format_section_header("STEP 3: DFA MINIMIZATION (HOPCROFT)"))
             
             # Format and log minimization steps
@@ -345,56 +457,112 @@ class App(tk.Tk):
             self.set_status("Error")
             return
 
-        # render minimized DFA
-        try:
-            draw_min_dfa(min_dfa, filename=os.path.join(DIAGRAM_DIR, 'min_dfa'))
-            self.log(TableFormatter.format_info_message(
-                f"Minimized DFA diagram saved: {os.path.join(DIAGRAM_DIR, 'min_dfa.png')}"
-            ))
-            self.display_image_safe('min_dfa', os.path.join(DIAGRAM_DIR, 'min_dfa.png'))
-        except Exception as e:
-            self.log(TableFormatter.format_error_message(f"Minimized DFA diagram rendering failed: {str(e)}"))
-            self.log(traceback.format_exc())
+        # show minimized DFA diagram
+        self._show_diagram('min_dfa', "Minimized DFA", diagram_errors['min_dfa'])
 
         # 5) string simulation
+        self._log_simulation(min_dfa, test)
+
+        self.log("\n" + "=" * 70)
+        self.log("PIPELINE EXECUTION COMPLETED SUCCESSFULLY")
+        self.log("=" * 70 + "\n")
+        self._last_regex, self._last_min_dfa = regex, min_dfa
+        self.set_status("Done")
+
+    def _log_simulation(self, min_dfa, test):
         try:
             self.log(TableFormatter.format_section_header("STEP 4: STRING SIMULATION"))
             
-            simulation = StringSimulation(input_string=test)
-            current = min_dfa.start
-            
-            if test:
-                for ch in test:
-                    next_state = min_dfa.transitions.get(current, {}).get(ch)
-                    next_str = next_state if next_state is not None else "REJECT"
-                    simulation.trace.append((current, ch, next_str))
-                    
-                    if next_state is None:
-                        simulation.result = "Rejected"
-                        break
-                    current = next_state
-                
-                if simulation.result == "Pending":
-                    if current in min_dfa.final_states:
-                        simulation.result = "Accepted"
-                    else:
-                        simulation.result = "Rejected"
-            else:
-                simulation.result = "Rejected (empty input)"
-            
+            simulation = simulate(min_dfa, test)
             self.log(simulation.to_formatted_string())
         except Exception as e:
             self.log(TableFormatter.format_error_message(f"String simulation failed: {str(e)}"))
             self.log(traceback.format_exc())
 
-        self.log("\n" + "=" * 70)
-        self.log("PIPELINE EXECUTION COMPLETED SUCCESSFULLY")
-        self.log("=" * 70 + "\n")
-        self.set_status("Done")
-
     # -------------------------
     # Image helpers
     # -------------------------
+    def _decode_thumbnail(self, path, size, mtime, zoomed=False, viewport=None):
+        # pure PIL work, safe to run on the pipeline worker thread; the lock only guards
+        # the dict, so the Tk thread never waits for a decode or resample
+        img = None
+        with self._img_lock:
+            hit = self._pil_cache.get(path)
+            if hit is not None and hit[0] == mtime:
+                self._pil_cache.move_to_end(path)
+                img = hit[1]  # our reference keeps it usable even if evicted meanwhile
+        if img is None:
+            with Image.open(path) as src:
+                img = src.convert("RGBA")
+            with self._img_lock:
+                self._pil_cache[path] = (mtime, img)
+                self._pil_cache.move_to_end(path)
+                # evicted images are not close()d: another thread may still be resizing
+                # one, and dropping the last reference frees its buffer anyway
+                while len(self._pil_cache) > IMAGE_CACHE_SIZE:
+                    self._pil_cache.popitem(last=False)
+        return self._thumbnail(img, size, zoomed, viewport)
+
+    @staticmethod
+    def _thumbnail(img, size, zoomed=False, viewport=None):
+        # fit img into size (keeping aspect ratio) without resampling pixels nobody sees;
+        # always returns a new image so the cached original is never handed out
+        w, h = img.size
+        scale = min(size[0] / w, size[1] / h)
+        if scale > 1 and not zoomed:
+            scale = 1  # never enlarge a diagram the user did not zoom into
+        elif scale > 1 and viewport is not None:
+            # zoomed past native resolution: only upscale the part the label can show
+            vw = min(w, max(1, int(viewport[0] / scale)))
+            vh = min(h, max(1, int(viewport[1] / scale)))
+            left, top = (w - vw) // 2, (h - vh) // 2
+            img = img.crop((left, top, left + vw, top + vh))
+            w, h = vw, vh
+        elif scale < 1:
+            factor = int(1 / scale)
+            if factor >= 2:
+                # fast box-filter integer downscale, LANCZOS only for the remainder
+                img = img.reduce(factor)
+        target = (max(1, round(w * scale)), max(1, round(h * scale)))
+        return img.resize(target, Image.LANCZOS)
+
+    def _cached_photo(self, path, size, viewport, mtime):
+        with self._img_lock:
+            hit = self._thumb_cache.get((path, size, viewport))
+            if hit is None or hit[0] != mtime:
+                return None
+            self._thumb_cache.move_to_end((path, size, viewport))
+            return hit[1]
+
+    def _apply_image(self, key, img, path=None, size=None, viewport=None, mtime=None):
+        # PhotoImage must be created on the Tk main thread
+        photo = ImageTk.PhotoImage(img)
+        if path is not None:
+            with self._img_lock:
+                self._thumb_cache[(path, size, viewport)] = (mtime, photo)
+                while len(self._thumb_cache) > IMAGE_CACHE_SIZE:
+                    self._thumb_cache.popitem(last=False)
+        self._show_photo(key, photo)
+
+    def _show_photo(self, key, photo):
+        self.image_labels[key].config(image=photo, text='')
+        # retain reference
+        self._img_refs[key] = photo
+
+    def _show_diagram(self, key, kind, err):
+        # log and display one diagram; err is its render_all_cached result
+        path = os.path.join(DIAGRAM_DIR, f"{key}.png")
+        if err is not None:
+            self.log(TableFormatter.format_error_message(f"{kind} diagram rendering failed: {str(err)}"))
+            self.log(''.join(traceback.format_exception(type(err), err, err.__traceback__)))
+            return
+        self.log(TableFormatter.format_info_message(f"{kind} diagram saved: {path}"))
+        self.display_image_safe(key, path)
+
+    def _on_label_configure(self, key, event):
+        # Tk thread: remember the label size so workers never have to ask Tk for it
+        self._viewports[key] = (event.width, event.height) if event.width >= 2 and event.height >= 2 else None
+
     def display_image_safe(self, key, path):
         # Display PNG in GUI if possible; otherwise open externally
         if not os.path.exists(path):
@@ -402,31 +570,29 @@ class App(tk.Tk):
             return
         if PIL_AVAILABLE:
             try:
-                img = Image.open(path)
-                img = img.convert("RGBA")
-                img.thumbnail(self._thumb_size, Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-                self.image_labels[key].config(image=photo, text='')
-                # retain reference
-                self._img_refs[key] = photo
+                size = self._thumb_size
+                zoomed = self._zoomed
+                # the crop only applies to a zoomed-in view, so keep it out of the cache key otherwise
+                viewport = self._viewports.get(key) if zoomed else None
+                mtime = os.path.getmtime(path)
+                photo = self._cached_photo(path, size, viewport, mtime)
+                if photo is not None:
+                    self.after(0, self._show_photo, key, photo)
+                    return
+                # decode/resize on the calling thread, hand the result to the Tk loop
+                img = self._decode_thumbnail(path, size, mtime, zoomed, viewport)
+                self.after(0, self._apply_image, key, img, path, size, viewport, mtime)
             except Exception as e:
                 self.log("PIL display error: " + str(e))
                 try:
-                    if os.name == 'nt':
-                        os.startfile(path)
-                    else:
-                        import subprocess
-                        subprocess.run(['xdg-open', path])
+                    open_external(path)
                 except Exception:
                     pass
         else:
             # fallback: open externally
             try:
-                if os.name == 'nt':
-                    os.startfile(path)
-                else:
-                    import subprocess
-                    subprocess.run(['xdg-open', path])
+                if not open_external(path):
+                    self.log(f"No image viewer found, open manually: {path}")
             except Exception as e:
                 self.log("Cannot open image externally: " + str(e))
 
@@ -436,6 +602,7 @@ class App(tk.Tk):
         w = max(80, int(w * factor))
         h = max(60, int(h * factor))
         self._thumb_size = (w, h)
+        self._zoomed = w > THUMB_SIZE[0] or h > THUMB_SIZE[1]
         path = os.path.join(DIAGRAM_DIR, f"{key}.png")
         if os.path.exists(path):
             self.display_image_safe(key, path)
@@ -0,0 +1,71 @@
+# lazy_dfa.py - simulate an NFA through DFA states materialized on demand
+from typing import Dict, List, Optional
+from thompson_nfa import NFA
+from subset_dfa import to_bit_nfa
+
+MAX_STATES = 4096
+
+
+class LazyDFA:
+    """Subset construction done lazily: only states reached by the input are built.
+
+    Each DFA state is an interned bitmask over the NFA states (see
+    BitNFA). Once `max_states` sets are interned the cache is frozen and
+    unseen sets are stepped as plain NFA state sets instead.
+    """
+
+    def __init__(self, nfa: NFA, max_states: int = MAX_STATES):
+        self.nfa = nfa
+        self.bits = to_bit_nfa(nfa)
+        self.sym_idx = {a: c for c, a in enumerate(self.bits.alphabet)}
+        self.max_states = max_states
+        self.cache: Dict[int, int] = {}
+        self.sets: List[int] = []
+        self.trans: List[Dict[str, int]] = []
+        self.frozen = False
+        self.start = self._intern(self.bits.start_mask)
+
+    def _intern(self, state_set: int) -> Optional[int]:
+        sid = self.cache.get(state_set)
+        if sid is not None or self.frozen:
+            return sid
+        sid = len(self.sets)
+        self.cache[state_set] = sid
+        self.sets.append(state_set)
+        self.trans.append({})
+        if len(self.sets) >= self.max_states:
+            self.frozen = True
+        return sid
+
+    def _next_set(self, state_set: int, ch) -> int:
+        c = self.sym_idx.get(ch)
+        return 0 if c is None else self.bits.step(state_set, c)
+
+    def step(self, state_id: int, ch: str) -> Optional[int]:
+        """Id of the state reached on ch, or None if the cache is full"""
+        row = self.trans[state_id]
+        nxt = row.get(ch)
+        if nxt is None:
+            nxt = self._intern(self._next_set(self.sets[state_id], ch))
+            if nxt is None:
+                return None
+            row[ch] = nxt
+        return nxt
+
+    def accepts(self, s: str) -> bool:
+        cur = self.start
+        for i, ch in enumerate(s):
+            nxt = self.step(cur, ch)
+            if nxt is None:
+                return self._accepts_nfa(self.sets[cur], s[i:])
+            cur = nxt
+            if not self.sets[cur]:
+                return False
+        return bool(self.sets[cur] & self.bits.accept_bit)
+
+    def _accepts_nfa(self, state_set: int, rest: str) -> bool:
+        for ch in rest:
+            state_set = self._next_set(state_set, ch)
+            if not state_set:
+                return False
+        return bool(state_set & self.bits.accept_bit)
@@ -1,13 +1,10 @@
 # main.py - Integration runner for Group 12 project (hardcoded RE)
 import os
-from regex_parser import to_postfix
-from thompson_nfa import build_from_postfix, NFA
-from subset_dfa import nfa_to_dfa, DFA
-from minimizer import hopcroft_minimize
-from visualize import draw_nfa, draw_dfa, draw_min_dfa
+from pipeline import compile_pipeline, simulate, render_all_cached, PipelineError
+from visualize import nfa_dot, dfa_dot, min_dfa_dot, draw_all
 from table_formatter import (
     TableFormatter, create_nfa_table, create_dfa_table,
-    create_minimized_dfa_table, MinimizationSteps, StringSimulation
+    create_minimized_dfa_table, MinimizationSteps
 )
 
 # ensure diagrams folder exists
@@ -21,25 +18,38 @@ DEFAULT_TEST = "ggh"
 def run(regex, teststring):
     """Execute the complete RE to automaton pipeline with structured output"""
     
-    # 1) Parse regex to postfix
+    # 1) Parse regex and compile automata (cached per regex string)
     try:
-        postfix = to_postfix(regex)
-        print(TableFormatter.format_pipeline_start(regex, postfix))
-    except Exception as e:
-        print(TableFormatter.format_error_message(f"Regex parsing failed: {str(e)}"))
+        artifacts = compile_pipeline(regex)
+        print(TableFormatter.format_pipeline_start(regex, artifacts.postfix))
+    except PipelineError as e:
+        print(TableFormatter.format_error_message(f"{e.stage} failed: {str(e.cause)}"))
         return
 
+    # Render all three diagrams in one batch so the dot runs overlap
+    # each diagram reports its own outcome, so one failed render does not hide the others
+    try:
+        nfa_err, dfa_err, min_dfa_err = render_all_cached(draw_all, [
+            ("NFA", lambda: nfa_dot(artifacts.nfa), 'diagrams/nfa'),
+            ("DFA", lambda: dfa_dot(artifacts.dfa), 'diagrams/dfa'),
+            ("Minimized DFA", lambda: min_dfa_dot(artifacts.min_dfa), 'diagrams/min_dfa'),
+        ], regex)
+    except Exception as e:
+        nfa_err = dfa_err = min_dfa_err = e
+
     # 2) Build NFA
     try:
         print(TableFormatter.format_section_header("STEP 1: THOMPSON NFA CONSTRUCTION"))
-        nfa = build_from_postfix(postfix)
+        nfa = artifacts.nfa
         nfa_table = create_nfa_table(nfa)
         print(nfa_table.to_formatted_string())
         print(TableFormatter.format_info_message(
             f"NFA built successfully with {len(nfa_table.rows)} states"
         ))
-        draw_nfa(nfa, filename='diagrams/nfa')
-        print(TableFormatter.format_info_message("NFA diagram saved: diagrams/nfa.png"))
+        if nfa_err is None:
+            print(TableFormatter.format_info_message("NFA diagram saved: diagrams/nfa.png"))
+        else:
+            print(TableFormatter.format_error_message(f"NFA diagram rendering failed: {str(nfa_err)}"))
     except Exception as e:
         print(TableFormatter.format_error_message(f"NFA construction failed: {str(e)}"))
         return
@@ -47,14 +57,16 @@ def run(regex, teststring):
     # 3) Build DFA
     try:
         print(TableFormatter.format_section_header("STEP 2: SUBSET CONSTRUCTION (DFA)"))
-        dfa = nfa_to_dfa(nfa)
+        dfa = artifacts.dfa
         dfa_table = create_dfa_table(dfa)
         print(dfa_table.to_formatted_string())
         print(TableFormatter.format_info_message(
             f"DFA constructed with {len(dfa_table.rows)} states"
         ))
-        draw_dfa(dfa, filename='diagrams/dfa')
-        print(TableFormatter.format_info_message("DFA diagram saved: diagrams/dfa.png"))
+        if dfa_err is None:
+            print(TableFormatter.format_info_message("DFA diagram saved: diagrams/dfa.png"))
+        else:
+            print(TableFormatter.format_error_message(f"DFA diagram rendering failed: {str(dfa_err)}"))
     except Exception as e:
         print(TableFormatter.format_error_message(f"DFA construction failed: {str(e)}"))
         return
@@ -62,7 +74,7 @@ def run(regex, teststring):
     # 4) Minimize DFA
     try:
         print(TableFormatter.format_section_header("STEP 3: DFA MINIMIZATION (HOPCROFT)"))
-        min_dfa, steps = hopcroft_minimize(dfa)
+        min_dfa, steps = artifacts.min_dfa, artifacts.steps
         
         # Format and print minimization steps
         min_steps_obj = MinimizationSteps(steps=steps)
@@ -76,8 +88,10 @@ def run(regex, teststring):
             f"DFA minimized: {len(dfa_table.rows)} states → {len(min_table.rows)} states"
         ))
         
-        draw_min_dfa(min_dfa, filename='diagrams/min_dfa')
-        print(TableFormatter.format_info_message("Minimized DFA diagram saved: diagrams/min_dfa.png"))
+        if min_dfa_err is None:
+            print(TableFormatter.format_info_message("Minimized DFA diagram saved: diagrams/min_dfa.png"))
+        else:
+            print(TableFormatter.format_error_message(f"Minimized DFA diagram rendering failed: {str(min_dfa_err)}"))
     except Exception as e:
         print(TableFormatter.format_error_message(f"DFA minimization failed: {str(e)}"))
         return
@@ -86,28 +100,7 @@ def run(regex, teststring):
     try:
         print(TableFormatter.format_section_header("STEP 4: STRING SIMULATION"))
         
-        simulation = StringSimulation(input_string=teststring)
-        current = min_dfa.start
-        
-        if teststring:
-            for ch in teststring:
-                next_state = min_dfa.transitions.get(current, {}).get(ch)
-                next_str = next_state if next_state is not None else "REJECT"
-                simulation.trace.append((current, ch, next_str))
-                
-                if next_state is None:
-                    simulation.result = "Rejected"
-                    break
-                current = next_state
-            
-            if simulation.result == "Pending":
-                if current in min_dfa.final_states:
-                    simulation.result = "Accepted"
-                else:
-                    simulation.result = "Rejected"
-        else:
-            simulation.result = "Rejected (empty input)"
-        
+        simulation = simulate(min_dfa, teststring)
         print(simulation.to_formatted_string())
     except Exception as e:
         print(TableFormatter.format_error_message(f"String simulation failed: {str(e)}"))
@@ -1,9 +1,11 @@
 
 # minimizer.py - Hopcroft's minimization algorithm (returns MinDFA and steps)
+from array import array
 from collections import deque
-from dataclasses import dataclass
-from typing import Dict, Set
-from subset_dfa import DFA
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Dict, List, Set
+from subset_dfa import DFA, bits
 
 @dataclass
 class MinDFA:
@@ -12,65 +14,166 @@ class MinDFA:
     transitions: Dict[str, Dict[str, str]]
     final_states: Set[str]
     alphabet: Set[str]
+    # dense row-major form for simulation: dense_table[state_id * len(sym_idx) + sym] = next id (-1 = none)
+    state_names: List[str] = field(init=False, repr=False)
+    sym_idx: Dict[str, int] = field(init=False, repr=False)
+    dense_table: array = field(init=False, repr=False)
+    start_id: int = field(init=False, repr=False)
+    final_ids: bytearray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.state_names = list(self.states)
+        state_ids = {s: i for i, s in enumerate(self.state_names)}
+        symbols = sorted(self.alphabet)
+        self.sym_idx = {a: i for i, a in enumerate(symbols)}
+        self.dense_table = array('i', [
+            state_ids.get(self.transitions.get(s, {}).get(a), -1)
+            for s in self.state_names for a in symbols
+        ])
+        self.start_id = state_ids[self.start]
+        self.final_ids = bytearray(s in self.final_states for s in self.state_names)
+
+class PartitionSnapshot(Sequence):
+    """Read-only partition recorded in the steps; blocks stay bitmasks until accessed"""
+    __slots__ = ('_masks', '_names')
+
+    def __init__(self, masks, names):
+        self._masks = masks
+        self._names = names
+
+    def __len__(self):
+        return len(self._masks)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        names = self._names
+        return frozenset(names[b] for b in bits(self._masks[i]))
+
+    def __repr__(self):
+        return repr(list(self))
 
 def hopcroft_minimize(dfa: DFA):
-    alphabet = sorted(dfa.alphabet)
-    states = set(dfa.states.keys())
-    trans = {s: {a: dfa.transitions.get(s, {}).get(a) for a in alphabet} for s in states}
+    alphabet = dfa.sorted_alphabet
+    nsym = len(alphabet)
+    sym_id = {a: i for i, a in enumerate(alphabet)}
+
+    # number the states so partition blocks can be int bitmasks (bit i = state_list[i])
+    state_list = list(dfa.states)
+    state_id = {s: i for i, s in enumerate(state_list)}
+
+    # flat row-major transitions: T[i * nsym + c] = target id, -1 while undefined
+    T = array('i', [-1]) * (len(state_list) * nsym)
+    for s, row in dfa.transitions.items():
+        base = state_id[s] * nsym
+        for a, d in row.items():
+            T[base + sym_id[a]] = state_id[d]
 
     # add dead state if needed
-    dead_needed = any(trans[s].get(a) is None for s in states for a in alphabet)
-    if dead_needed:
-        dead = 'DEAD'
-        states.add(dead)
-        trans[dead] = {a: dead for a in alphabet}
-        for s in list(states):
-            for a in alphabet:
-                if trans.get(s, {}).get(a) is None:
-                    trans[s][a] = dead
-
-    P = [set(dfa.final_states), states - set(dfa.final_states)]
+    if -1 in T:
+        dead = len(state_list)
+        state_list.append('DEAD')
+        T = array('i', [dead if t < 0 else t for t in T])
+        T.extend([dead] * nsym)
+
+    # inverse transitions: inv_mask[c][t] = bitmask of states that go to state t on c
+    n = len(state_list)
+    inv_mask = [[0] * n for _ in alphabet]
+    for i in range(n):
+        bit = 1 << i
+        base = i * nsym
+        for c in range(nsym):
+            inv_mask[c][T[base + c]] |= bit
+
+    final_mask = 0
+    for s in dfa.final_states:
+        final_mask |= 1 << state_id[s]
+    all_mask = (1 << n) - 1
+
+    # blocks are immutable ints: hashable for the worklist and safe to share with steps
+    P = [final_mask, all_mask & ~final_mask]
     P = [p for p in P if p]
-    W = deque(P.copy())
-    steps = [('Initial partition', [set(x) for x in P])]
+    # W keeps FIFO order, w_set membership; entries no longer in w_set are stale
+    W = deque(P)
+    w_set = set(P)
+    mask_steps = [('Initial partition', P)]
+
+    # block_of[q] = id of the block holding state q, blocks[id] = that block's mask
+    blocks = list(P)
+    block_of = array('i', [0]) * n
+    for b, Y in enumerate(blocks):
+        for q in bits(Y):
+            block_of[q] = b
 
     while W:
         A = W.popleft()
-        for c in alphabet:
-            X = set(q for q in states if trans[q][c] in A)
-            newP = []
-            for Y in P:
+        if A not in w_set:
+            continue
+        w_set.discard(A)
+        a_ids = list(bits(A))  # decoded once, reused for every symbol
+        for c, inv_c in zip(alphabet, inv_mask):
+            X = 0
+            for t in a_ids:
+                X |= inv_c[t]
+            if not X:
+                continue  # nothing leads into A on c, no block can split
+            # only blocks holding a state of X can split; the rest of P is not visited
+            touched = {block_of[q] for q in bits(X)}
+            splits = []
+            for b in touched:
+                Y = blocks[b]
                 inter = Y & X
-                diff = Y - X
-                if inter and diff:
-                    newP.extend([inter, diff])
-                    if Y in W:
-                        W.remove(Y)
-                        W.extend([inter, diff])
-                    else:
-                        if len(inter) <= len(diff):
-                            W.append(inter)
-                        else:
-                            W.append(diff)
+                if inter != Y:
+                    splits.append((P.index(Y), b, Y, inter, Y ^ inter))
+            if not splits:
+                continue
+            # handle splits in partition order, so W and the steps come out as a full scan would
+            splits.sort()
+            for _, b, Y, inter, diff in splits:
+                if Y in w_set:
+                    w_set.discard(Y)
+                    W.extend([inter, diff])
+                    w_set.update((inter, diff))
+                else:
+                    smaller = inter if inter.bit_count() <= diff.bit_count() else diff
+                    W.append(smaller)
+                    w_set.add(smaller)
+                # the smaller half gets the new id, so each state is relabelled O(log n) times
+                if inter.bit_count() <= diff.bit_count():
+                    blocks[b], moved = diff, inter
                 else:
-                    newP.append(Y)
-            if newP != P:
-                P = newP
-                steps.append((f"Refine on symbol '{c}'", [set(x) for x in P]))
+                    blocks[b], moved = inter, diff
+                new_b = len(blocks)
+                blocks.append(moved)
+                for q in bits(moved):
+                    block_of[q] = new_b
+            # earlier snapshots keep the old list; Y is replaced by inter, diff in place
+            P = P.copy()
+            for pos, _, _, inter, diff in reversed(splits):
+                P[pos:pos + 1] = [inter, diff]
+            mask_steps.append((f"Refine on symbol '{c}'", P))
+
+    def members(mask):
+        return frozenset(state_list[i] for i in bits(mask))
+
+    # partitions are decoded to state names only if the steps get formatted
+    steps = [(title, PartitionSnapshot(part, state_list)) for title, part in mask_steps]
 
     # build minimized DFA
     rep = {}
     mname = {}
+    min_trans = {}
+    for i, block in enumerate(P):
+        for q in bits(block):
+            block_of[q] = i
     for i, block in enumerate(P):
         name = f"M{i}"
-        mname[name] = block
-        for q in block:
+        mname[name] = set(members(block))
+        for q in mname[name]:
             rep[q] = name
-
-    min_trans = {}
-    for name, members in mname.items():
-        rep_state = next(iter(members))
-        min_trans[name] = {a: rep[trans[rep_state][a]] for a in alphabet}
+        rep_id = next(bits(block))
+        base = rep_id * nsym
+        min_trans[name] = {a: f"M{block_of[T[base + c]]}" for c, a in enumerate(alphabet)}
 
     min_start = rep[dfa.start]
     min_finals = {rep[s] for s in dfa.final_states}
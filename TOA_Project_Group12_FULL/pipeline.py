@@ -0,0 +1,124 @@
+# pipeline.py - compile RE -> postfix -> NFA -> DFA -> MinDFA once per regex string
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from regex_parser import to_postfix
+from thompson_nfa import build_from_postfix, NFA
+from subset_dfa import nfa_to_dfa, DFA
+from minimizer import hopcroft_minimize, MinDFA
+from table_formatter import StringSimulation
+
+
+class PipelineError(Exception):
+    """Raised by compile_pipeline; `stage` names the step that failed"""
+
+    def __init__(self, stage: str, cause: Exception):
+        super().__init__(f"{stage} failed: {cause}")
+        self.stage = stage
+        self.cause = cause
+
+
+@dataclass(frozen=True)
+class PipelineArtifacts:
+    """Everything produced by stages 1-4 for a single regex"""
+    regex: str
+    postfix: Tuple[str, ...]
+    nfa: NFA
+    dfa: DFA
+    min_dfa: MinDFA
+    steps: List[Tuple[str, Sequence[frozenset]]]
+
+
+@lru_cache(maxsize=64)
+def compile_pipeline(regex: str) -> PipelineArtifacts:
+    """Run parsing, Thompson, subset construction and Hopcroft (memoized on regex)"""
+    try:
+        postfix = to_postfix(regex)
+    except Exception as e:
+        raise PipelineError("Regex parsing", e) from e
+    try:
+        nfa = build_from_postfix(postfix)
+    except Exception as e:
+        raise PipelineError("NFA construction", e) from e
+    try:
+        dfa = nfa_to_dfa(nfa)
+    except Exception as e:
+        raise PipelineError("DFA construction", e) from e
+    try:
+        min_dfa, steps = hopcroft_minimize(dfa)
+    except Exception as e:
+        raise PipelineError("DFA minimization", e) from e
+    return PipelineArtifacts(regex, postfix, nfa, dfa, min_dfa, steps)
+
+
+def simulate(min_dfa: MinDFA, test: str) -> StringSimulation:
+    """Run the test string through the minimized DFA and record the trace"""
+    simulation = StringSimulation(input_string=test)
+
+    if test:
+        names = min_dfa.state_names
+        table = min_dfa.dense_table
+        sym_idx = min_dfa.sym_idx
+        width = len(sym_idx)
+        append = simulation.trace.append
+        current = min_dfa.start_id
+        try:
+            for ch in test:
+                next_id = table[current * width + sym_idx[ch]]
+                if next_id < 0:
+                    raise KeyError(ch)
+                append((names[current], ch, names[next_id]))
+                current = next_id
+        except KeyError:
+            # ch is outside the alphabet (or has no transition)
+            append((names[current], ch, "REJECT"))
+            simulation.result = "Rejected"
+
+        if simulation.result == "Pending":
+            if min_dfa.final_ids[current]:
+                simulation.result = "Accepted"
+            else:
+                simulation.result = "Rejected"
+    else:
+        simulation.result = "Rejected (empty input)"
+
+    return simulation
+
+
+# png path -> (regex it depicts, mtime right after rendering)
+_rendered: Dict[str, Tuple[str, float]] = {}
+
+
+def needs_render(regex: str, png_path: str) -> bool:
+    """True unless png_path was rendered for this regex and is untouched since"""
+    rec = _rendered.get(png_path)
+    if rec is None or rec[0] != regex or not os.path.exists(png_path):
+        return True
+    return os.path.getmtime(png_path) != rec[1]
+
+
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+
+def render_all_cached(draw_all, jobs, regex: str, force: bool = False) -> List[Optional[BaseException]]:
+    """Pass the (kind, source, filename) jobs whose PNG does not already show this regex to draw_all
+
+    Returns draw_all's per-job result (None or the render error) in job order;
+    jobs whose PNG was already up to date count as None.
+    """
+    stale = [force or needs_render(regex, filename + '.png') for _, _, filename in jobs]
+    todo = [job for job, s in zip(jobs, stale) if s]
+    if not todo:
+        return [None] * len(jobs)
+    before = [_mtime(filename + '.png') for _, _, filename in todo]
+    results = draw_all(todo)
+    # only trust a file draw_all actually (re)wrote, e.g. graphviz may be missing
+    for (_, _, filename), b, err in zip(todo, before, results):
+        png = filename + '.png'
+        after = _mtime(png)
+        if err is None and after is not None and after != b:
+            _rendered[png] = (regex, after)
+    results = iter(results)
+    return [next(results) if s else None for s in stale]
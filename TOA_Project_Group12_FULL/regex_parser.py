@@ -1,73 +1,100 @@
 
 # regex_parser.py - validate and convert infix RE to postfix (explicit concat '.')
-def validate_regex(regex: str):
-    stack = []
-    prev = None
-    for i, c in enumerate(regex):
-        if c == ' ':
-            continue
-        if c == '(':
-            stack.append(i)
-        elif c == ')':
-            if not stack:
-                raise ValueError(f"Invalid Regular Expression: Unmatched closing parenthesis at position {i}")
-            stack.pop()
-        elif c == '+':
-            if prev is None or prev in '+.(':
-                raise ValueError(f"Invalid Regular Expression: Invalid use of '+' at position {i}")
-        elif c == '*':
-            if prev is None or prev in '+.(':
-                raise ValueError(f"Invalid Regular Expression: Invalid use of '*' at position {i}")
-            if prev == '*':
-                raise ValueError(f"Invalid Regular Expression: Invalid repetition operator '*' at position {i-1}")
-        else:
-            if not c.isalnum():
-                raise ValueError(f"Invalid Regular Expression: Unknown symbol '{c}' at position {i}")
-        prev = c
-    if stack:
-        pos = stack[-1]
-        raise ValueError(f"Invalid Regular Expression: Missing closing parenthesis for '(' at position {pos}")
-    if prev in '+.':
-        raise ValueError(f"Invalid Regular Expression: Expression ends with invalid operator '{prev}'")
+from functools import lru_cache
+from typing import Tuple
 
-def add_concat(regex: str) -> str:
-    output = []
-    prev = None
-    for c in regex:
-        if c == ' ':
-            continue
-        if prev is not None:
-            if (prev.isalnum() or prev == '*' or prev == ')') and (c.isalnum() or c == '('):
-                output.append('.')
-        output.append(c)
-        prev = c
-    return ''.join(output)
+# character classes, looked up by ord(c) instead of per-char str method calls
+OTHER, ALNUM, LPAREN, RPAREN, PLUS, STAR, SPACE, START = range(8)
+CLASS = bytearray(256)
+for _b in range(256):
+    if chr(_b).isalnum():
+        CLASS[_b] = ALNUM
+for _c, _k in (('(', LPAREN), (')', RPAREN), ('+', PLUS), ('*', STAR), (' ', SPACE)):
+    CLASS[ord(_c)] = _k
+CLASS = bytes(CLASS)
+
+# OP_ERR[prev][cur]: 1 = operator without an operand before it, 2 = repeated '*'
+OP_ERR = [bytearray(8) for _ in range(8)]
+for _p in (START, PLUS, LPAREN):
+    OP_ERR[_p][PLUS] = OP_ERR[_p][STAR] = 1
+OP_ERR[STAR][STAR] = 2
+OP_ERR = tuple(bytes(row) for row in OP_ERR)
+
+# NEED_CONCAT[prev][cur]: an implicit '.' goes between prev and cur
+NEED_CONCAT = [bytearray(8) for _ in range(8)]
+for _p in (ALNUM, STAR, RPAREN):
+    NEED_CONCAT[_p][ALNUM] = NEED_CONCAT[_p][LPAREN] = 1
+NEED_CONCAT = tuple(bytes(row) for row in NEED_CONCAT)
 
 precedence = {'*': 3, '.': 2, '+': 1}
 
-def to_postfix(regex: str) -> str:
-    validate_regex(regex)
-    regex2 = add_concat(regex)
+# to_postfix keeps operator classes on its stack; CONCAT is the implicit '.'
+CONCAT = 8
+PREC = bytearray(9)
+PREC[PLUS], PREC[CONCAT], PREC[STAR] = precedence['+'], precedence['.'], precedence['*']
+PREC = bytes(PREC)
+OP_CHAR = [''] * 9
+OP_CHAR[PLUS], OP_CHAR[CONCAT], OP_CHAR[STAR] = '+', '.', '*'
+OP_CHAR = tuple(OP_CHAR)
+
+@lru_cache(maxsize=256)
+def to_postfix(regex: str) -> Tuple[str, ...]:
+    # single pass: validate, insert implicit concatenation and shunt operators;
+    # returns the postfix tokens (a tuple, since the result is cached and shared)
     out = []
     stack = []
-    for token in regex2:
-        if token.isalnum():
-            out.append(token)
-        elif token == '(':
-            stack.append(token)
-        elif token == ')':
-            while stack and stack[-1] != '(':
-                out.append(stack.pop())
-            if not stack:
-                raise ValueError("Invalid Regular Expression: Unmatched parenthesis during parsing")
+    parens = []
+    prev = START
+    concat_prec = PREC[CONCAT]
+    for i, c in enumerate(regex):
+        o = ord(c)
+        k = CLASS[o] if o < 256 else (ALNUM if c.isalnum() else OTHER)
+        if k == SPACE:
+            continue
+        if k == OTHER:
+            raise ValueError(f"Invalid Regular Expression: Unknown symbol '{c}' at position {i}")
+        if NEED_CONCAT[prev][k]:
+            while stack and PREC[stack[-1]] >= concat_prec:
+                out.append(OP_CHAR[stack.pop()])
+            stack.append(CONCAT)
+        if k == ALNUM:
+            out.append(c)
+        elif k == LPAREN:
+            parens.append(i)
+            stack.append(LPAREN)
+        elif k == RPAREN:
+            if not parens:
+                raise ValueError(f"Invalid Regular Expression: Unmatched closing parenthesis at position {i}")
+            parens.pop()
+            while stack[-1] != LPAREN:
+                out.append(OP_CHAR[stack.pop()])
             stack.pop()
         else:
-            while stack and stack[-1] != '(' and precedence.get(stack[-1], 0) >= precedence.get(token, 0):
-                out.append(stack.pop())
-            stack.append(token)
+            err = OP_ERR[prev][k]
+            if err == 1:
+                raise ValueError(f"Invalid Regular Expression: Invalid use of '{c}' at position {i}")
+            if err == 2:
+                raise ValueError(f"Invalid Regular Expression: Invalid repetition operator '*' at position {i-1}")
+            # LPAREN has precedence 0, so this never pops past an open group
+            p = PREC[k]
+            while stack and PREC[stack[-1]] >= p:
+                out.append(OP_CHAR[stack.pop()])
+            stack.append(k)
+        prev = k
+    if parens:
+        raise ValueError(f"Invalid Regular Expression: Missing closing parenthesis for '(' at position {parens[-1]}")
+    if prev == PLUS:
+        raise ValueError("Invalid Regular Expression: Expression ends with invalid operator '+'")
+    if prev == START:
+        raise ValueError("Invalid Regular Expression: Empty expression")
     while stack:
-        t = stack.pop()
-        if t in '()':
-            raise ValueError("Invalid Regular Expression: Unmatched parenthesis in expression")
-        out.append(t)
-    return ''.join(out)
+        out.append(OP_CHAR[stack.pop()])
+    return tuple(out)
+
+def to_postfix_str(regex: str) -> str:
+    # postfix as a single string, e.g. for display
+    return ''.join(to_postfix(regex))
+
+def clear_caches():
+    # reset memoized parser results (used between test runs)
+    to_postfix.cache_clear()
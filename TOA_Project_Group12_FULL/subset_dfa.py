@@ -2,8 +2,9 @@
 # subset_dfa.py - convert NFA to DFA via subset construction
 from collections import defaultdict, deque
 from dataclasses import dataclass
+from functools import cached_property
 from itertools import count
-from typing import Dict, Set, FrozenSet
+from typing import Dict, List, Set
 from thompson_nfa import NFA, EPS
 
 _dcounter = count()
@@ -11,6 +12,29 @@ _dcounter = count()
 def _new_dstate():
     return f'D{next(_dcounter)}'
 
+# _BYTE_BITS[v] = offsets of the set bits of byte value v
+_BYTE_BITS = tuple(tuple(i for i in range(8) if v >> i & 1) for v in range(256))
+
+def bits(x: int):
+    """Yield the index of every set bit of x, lowest first"""
+    if x.bit_count() * 16 <= x.bit_length():
+        # sparse: isolate the lowest bit each time
+        while x:
+            b = x & -x
+            yield b.bit_length() - 1
+            x ^= b
+        return
+    # dense: decode a byte at a time through the lookup table
+    for k, v in enumerate(x.to_bytes((x.bit_length() + 7) // 8, 'little')):
+        if v:
+            base = k << 3
+            for i in _BYTE_BITS[v]:
+                yield base + i
+
+def _state_index(s):
+    # numeric part of 'D<n>' names, unknown names sort last
+    return int(s[1:]) if s[1:].isdigit() else 9999
+
 @dataclass
 class DFA:
     start: str
@@ -19,47 +43,161 @@ class DFA:
     final_states: Set[str]
     alphabet: Set[str]
 
+    @cached_property
+    def sorted_alphabet(self) -> List[str]:
+        return sorted(self.alphabet)
+
     def to_table(self):
-        header = ['State', 'NFA-set'] + sorted(self.alphabet)
+        alphabet = self.sorted_alphabet
+        header = ['State', 'NFA-set'] + alphabet
         rows = []
-        def idx(s):
-            try: return int(s[1:])
-            except: return 9999
-        for s in sorted(self.states.keys(), key=idx):
+        for s in sorted(self.states.keys(), key=_state_index):
             nfaset = '{' + ','.join(sorted(self.states[s])) + '}'
             row = [s, nfaset]
-            for a in sorted(self.alphabet):
-                row.append(self.transitions.get(s, {}).get(a, '-'))
+            trans = self.transitions.get(s, {})
+            for a in alphabet:
+                row.append(trans.get(a, '-'))
             rows.append(row)
         return header, rows
 
-def epsilon_closure(nfa: NFA, state_set: Set[str]):
-    stack = list(state_set)
-    closure = set(state_set)
-    while stack:
-        s = stack.pop()
-        for nxt in nfa.states.get(s, {}).get(EPS, []):
-            if nxt not in closure:
-                closure.add(nxt)
-                stack.append(nxt)
-    return closure
-
-def move(nfa: NFA, state_set: Set[str], symbol: str):
-    res = set()
-    for s in state_set:
-        res.update(nfa.states.get(s, {}).get(symbol, []))
-    return res
+def eps_closure_rows(nfa: NFA, sid: Dict[str, int]) -> List[int]:
+    """Epsilon-closure of every NFA state as a bitmask row, in linear time.
 
-def nfa_to_dfa(nfa: NFA) -> DFA:
+    rows[i] has bit j set iff state j is eps-reachable from state i (sid
+    numbers the states). Runs an iterative Tarjan over the eps-edges; SCCs
+    come out in reverse topological order, so each SCC's row is its
+    members' bits OR-ed with the (already final) rows of the SCCs it
+    points to. A bit-matrix Warshall would give the same rows in O(n^3).
+    """
+    n = len(sid)
+    adj = [()] * n
+    for s, tr in nfa.states.items():
+        adj[sid[s]] = [sid[d] for d in tr.get(EPS, ())]
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack = []
+    rows = [0] * n
+    counter = 0
+
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, iter(adj[root]))]
+        while work:
+            v, it = work[-1]
+            for w in it:
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append((w, iter(adj[w])))
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == index[v]:
+                    members = []
+                    row = 0
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        members.append(w)
+                        row |= 1 << w
+                        if w == v:
+                            break
+                    for m in members:
+                        for w in adj[m]:
+                            # rows of other members are still 0 here, which is harmless
+                            row |= rows[w]
+                    for m in members:
+                        rows[m] = row
+    return rows
+
+@dataclass
+class BitNFA:
+    """An NFA renumbered so state sets are int bitmasks (bit i = names[i])"""
+    names: List[str]
+    sid: Dict[str, int]
+    alphabet: List[str]
+    # move_rows[c][i] = eps-closure of the states reached from i on alphabet[c],
+    # src_masks[c] = the states that have any such edge
+    move_rows: List[List[int]]
+    src_masks: List[int]
+    eps_rows: List[int]
+    start_mask: int
+    accept_bit: int
+
+    def to_names(self, mask: int) -> Set[str]:
+        names = self.names
+        return {names[i] for i in bits(mask)}
+
+    def step(self, mask: int, c: int) -> int:
+        """Epsilon-closure of the states reached from mask on alphabet[c]"""
+        row = self.move_rows[c]
+        out = 0
+        for i in bits(mask & self.src_masks[c]):
+            out |= row[i]
+        return out
+
+def to_bit_nfa(nfa: NFA) -> BitNFA:
+    # alphabet plus a transposed successor map: succ[a][src] = destinations on a
     alphabet = set()
-    for trans in nfa.states.values():
-        for sym in trans:
+    succ = {}
+    for src, trans in nfa.states.items():
+        for sym, dsts in trans.items():
             if sym != EPS:
                 alphabet.add(sym)
+                succ.setdefault(sym, {})[src] = dsts
+
+    names = list(nfa.states)
+    sid = {s: i for i, s in enumerate(names)}
+
+    # epsilon-closure of every NFA state, computed once up front
+    eps_rows = eps_closure_rows(nfa, sid)
+
+    def closed_mask(states):
+        # closure of a union is the union of closures, so it is folded into the rows here
+        # and a moved set never needs a closure pass of its own
+        m = 0
+        for x in states:
+            m |= eps_rows[sid[x]]
+        return m
+    sorted_alpha = sorted(alphabet)
+    n = len(names)
+    move_rows = []
+    src_masks = []
+    for a in sorted_alpha:
+        row = [0] * n
+        srcs = 0
+        for src, dsts in succ[a].items():
+            i = sid[src]
+            row[i] = closed_mask(dsts)
+            srcs |= 1 << i
+        move_rows.append(row)
+        src_masks.append(srcs)
+    return BitNFA(names, sid, sorted_alpha, move_rows, src_masks, eps_rows,
+                  eps_rows[sid[nfa.start]], 1 << sid[nfa.accept])
+
+def nfa_to_dfa(nfa: NFA) -> DFA:
+    bn = to_bit_nfa(nfa)
+    to_names = bn.to_names
+    accept_bit = bn.accept_bit
+    sorted_alpha = bn.alphabet
 
-    start_closure = frozenset(epsilon_closure(nfa, {nfa.start}))
+    start_closure = bn.start_mask
     mapping = {start_closure: _new_dstate()}
-    dstates = {mapping[start_closure]: set(start_closure)}
+    dstates = {mapping[start_closure]: to_names(start_closure)}
     dtrans = {}
     dfinal = set()
     q = deque([start_closure])
@@ -67,19 +205,23 @@ def nfa_to_dfa(nfa: NFA) -> DFA:
     while q:
         T = q.popleft()
         Td = mapping[T]
-        dtrans.setdefault(Td, {})
-        if nfa.accept in T:
+        row_out = dtrans[Td] = {}
+        if T & accept_bit:
             dfinal.add(Td)
 
-        for a in sorted(alphabet):
-            moved = move(nfa, set(T), a)
-            if not moved:
+        for a, row, srcs in zip(sorted_alpha, bn.move_rows, bn.src_masks):
+            # rows are already eps-closed, so the union is the next DFA state
+            U = 0
+            for i in bits(T & srcs):
+                U |= row[i]
+            if not U:
                 continue
-            U = frozenset(epsilon_closure(nfa, moved))
-            if U not in mapping:
-                mapping[U] = _new_dstate()
-                dstates[mapping[U]] = set(U)
+            # one probe per (T, a); a set is named and enqueued only the first time it is seen
+            Ud = mapping.get(U)
+            if Ud is None:
+                Ud = mapping[U] = _new_dstate()
+                dstates[Ud] = to_names(U)
                 q.append(U)
-            dtrans[Td][a] = mapping[U]
+            row_out[a] = Ud
 
-    return DFA(start=mapping[start_closure], states=dstates, transitions=dtrans, final_states=dfinal, alphabet=alphabet)
+    return DFA(start=mapping[start_closure], states=dstates, transitions=dtrans, final_states=dfinal, alphabet=set(sorted_alpha))
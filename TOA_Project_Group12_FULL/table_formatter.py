@@ -5,7 +5,7 @@ Handles NFA, DFA, and Minimized DFA tables with consistent styling.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Sequence, Tuple, Union
 from enum import Enum
 
 
@@ -74,22 +74,21 @@ class TransitionTable:
             
             all_rows.append((row, cells))
         
-        # Calculate column widths
-        col_widths = [len(h) for h in header]
-        for _, cells in all_rows:
-            for i, cell in enumerate(cells):
-                col_widths[i] = max(col_widths[i], len(cell))
+        # Calculate column widths, one column at a time
+        columns = zip(*(cells for _, cells in all_rows))
+        col_widths = [max(len(h), max(map(len, col))) for h, col in zip(header, columns)]
+        template = " | ".join("%%-%ds" % w for w in col_widths)
         
         # Format header
         lines = [self.title]
         lines.append("")
-        header_row = " | ".join(h.ljust(w) for h, w in zip(header, col_widths))
+        header_row = template % tuple(header)
         lines.append(header_row)
         lines.append("-" * len(header_row))
         
         # Format data rows
         for row, cells in all_rows:
-            row_text = " | ".join(c.ljust(w) for c, w in zip(cells, col_widths))
+            row_text = template % tuple(cells)
             marker = row.state.get_marker()
             if marker:
                 row_text += f"  {marker}"
@@ -102,7 +101,7 @@ class TransitionTable:
 @dataclass
 class MinimizationSteps:
     """Represents the steps in DFA minimization"""
-    steps: List[Tuple[str, List[set]]] = field(default_factory=list)
+    steps: List[Tuple[str, Sequence[frozenset]]] = field(default_factory=list)
     
     def to_formatted_string(self) -> str:
         """Format minimization steps nicely"""
@@ -155,8 +154,10 @@ class TableFormatter:
     """Helper class for formatting pipeline output"""
     
     @staticmethod
-    def format_pipeline_start(regex: str, postfix: str) -> str:
-        """Format the pipeline start information"""
+    def format_pipeline_start(regex: str, postfix: Union[str, Sequence[str]]) -> str:
+        """Format the pipeline start information (postfix as a string or token list)"""
+        if not isinstance(postfix, str):
+            postfix = ''.join(postfix)
         lines = ["=" * 70]
         lines.append("REGULAR EXPRESSION TO FINITE AUTOMATON PIPELINE")
         lines.append("=" * 70)
@@ -3,7 +3,7 @@
 from collections import defaultdict
 from dataclasses import dataclass
 from itertools import count
-from typing import Dict, List
+from typing import Dict, Iterable, Sequence
 
 EPS = 'eps'
 _counter = count()
@@ -15,13 +15,18 @@ def _new_state():
 class NFA:
     start: str
     accept: str
-    states: Dict[str, Dict[str, List[str]]]
+    states: Dict[str, Dict[str, Sequence[str]]]
 
     def add_transition(self, src, symbol, dst):
         self.states.setdefault(src, defaultdict(list))
         self.states.setdefault(dst, defaultdict(list))
         self.states[src].setdefault(symbol, []).append(dst)
 
+    def freeze(self):
+        """Swap the defaultdict/list storage for plain dicts of tuples; no more add_transition after this"""
+        self.states = {s: {sym: tuple(dsts) for sym, dsts in tr.items()} for s, tr in self.states.items()}
+        return self
+
     def to_table(self):
         symbols = set()
         for trans in self.states.values():
@@ -38,7 +43,7 @@ class NFA:
             rows.append(row)
         return symbols, rows
 
-def build_from_postfix(postfix: str) -> NFA:
+def build_from_postfix(postfix: Iterable[str]) -> NFA:
     stack = []
     for token in postfix:
         if token.isalnum():
@@ -50,7 +55,7 @@ def build_from_postfix(postfix: str) -> NFA:
         elif token == '*':
             n1 = stack.pop()
             s = _new_state(); t = _new_state()
-            states = {**n1.states}
+            states = n1.states
             states.setdefault(s, defaultdict(list))
             states.setdefault(t, defaultdict(list))
             n = NFA(start=s, accept=t, states=states)
@@ -61,14 +66,17 @@ def build_from_postfix(postfix: str) -> NFA:
             stack.append(n)
         elif token == '.':
             n2 = stack.pop(); n1 = stack.pop()
-            states = {**n1.states, **n2.states}
+            # fragments on the stack are consumed, so n1's dict can be reused in place
+            states = n1.states
+            states.update(n2.states)
             n = NFA(start=n1.start, accept=n2.accept, states=states)
             n.add_transition(n1.accept, EPS, n2.start)
             stack.append(n)
         elif token == '+':
             n2 = stack.pop(); n1 = stack.pop()
             s = _new_state(); t = _new_state()
-            states = {**n1.states, **n2.states}
+            states = n1.states
+            states.update(n2.states)
             states.setdefault(s, defaultdict(list))
             states.setdefault(t, defaultdict(list))
             n = NFA(start=s, accept=t, states=states)
@@ -79,4 +87,4 @@ def build_from_postfix(postfix: str) -> NFA:
             stack.append(n)
         else:
             raise ValueError(f"Unknown token {token}")
-    return stack[0]
+    return stack[0].freeze()
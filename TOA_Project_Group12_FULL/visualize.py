@@ -1,82 +1,112 @@
 # visualize.py - Graphviz diagrams for NFA, DFA, Minimized DFA
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 try:
-    from graphviz import Digraph
+    from graphviz import Source
 except ImportError:
-    Digraph = None
+    Source = None
 
 
-def draw_nfa(nfa, filename='diagrams/nfa'):
-    if Digraph is None:
-        print("Graphviz not installed. Skipping NFA diagram.")
-        return
+def _quote(s):
+    # DOT double-quoted string; escaped once per id/label
+    return '"' + s.replace('\\', '\\\\').replace('"', '\\"') + '"'
 
-    g = Digraph(format='png')
-    g.attr('node', shape='circle', fontsize='10')
 
-    for s in nfa.states:
-        if s == nfa.accept:
-            g.node(s, peripheries='2', style='filled', fillcolor='lightblue')
-        else:
-            g.node(s)
+_HEADER = ['digraph {', '\tnode [fontsize=10 shape=circle]']
+_ACCEPT_ATTRS = ' [fillcolor=lightblue peripheries=2 style=filled]'
 
-    g.node('start', shape='point')
-    g.edge('start', nfa.start)
 
-    for s, trans in nfa.states.items():
-        for sym, lst in trans.items():
-            label = sym if sym != 'eps' else 'ε'
-            for d in lst:
-                g.edge(s, d, label=label)
+def _dot(states, is_accept, start, edges):
+    """DOT text for one automaton; edges yields (src, dst, label)"""
+    ids = {s: _quote(s) for s in states}
+    lines = list(_HEADER)
+    for s, q in ids.items():
+        lines.append(f'\t{q}{_ACCEPT_ATTRS}' if is_accept(s) else f'\t{q}')
 
-    g.render(filename, cleanup=True)
-    print(f"NFA diagram saved as: {filename}.png")
+    lines.append('\tstart [shape=point]')
+    lines.append(f'\tstart -> {ids[start]}')
 
+    labels = {}
+    for s, d, sym in edges:
+        label = labels.get(sym)
+        if label is None:
+            label = labels[sym] = _quote(sym)
+        lines.append(f'\t{ids[s]} -> {ids[d]} [label={label}]')
 
-def draw_dfa(dfa, filename='diagrams/dfa'):
-    if Digraph is None:
-        print("Graphviz not installed. Skipping DFA diagram.")
-        return
+    lines.append('}')
+    return '\n'.join(lines)
 
-    g = Digraph(format='png')
-    g.attr('node', shape='circle', fontsize='10')
 
-    for s in dfa.states:
-        if s in dfa.final_states:
-            g.node(s, peripheries='2', style='filled', fillcolor='lightblue')
-        else:
-            g.node(s)
+def nfa_dot(nfa):
+    edges = ((s, d, sym if sym != 'eps' else 'ε')
+             for s, trans in nfa.states.items()
+             for sym, lst in trans.items()
+             for d in lst)
+    return _dot(nfa.states, lambda s: s == nfa.accept, nfa.start, edges)
 
-    g.node('start', shape='point')
-    g.edge('start', dfa.start)
 
-    for s, trans in dfa.transitions.items():
-        for sym, d in trans.items():
-            g.edge(s, d, label=sym)
+def dfa_dot(dfa):
+    edges = ((s, d, sym) for s, trans in dfa.transitions.items() for sym, d in trans.items())
+    return _dot(dfa.states, dfa.final_states.__contains__, dfa.start, edges)
 
-    g.render(filename, cleanup=True)
-    print(f"DFA diagram saved as: {filename}.png")
 
+def min_dfa_dot(min_dfa):
+    edges = ((s, d, sym) for s, trans in min_dfa.transitions.items() for sym, d in trans.items())
+    return _dot(min_dfa.states, min_dfa.final_states.__contains__, min_dfa.start, edges)
 
-def draw_min_dfa(min_dfa, filename='diagrams/min_dfa'):
-    if Digraph is None:
-        print("Graphviz not installed. Skipping Minimized DFA diagram.")
-        return
 
-    g = Digraph(format='png')
-    g.attr('node', shape='circle', fontsize='10')
+def render_png(source, filename):
+    """Pipe DOT text through dot and write filename.png (no intermediate .gv file)"""
+    data = Source(source, format='png').pipe()
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(filename + '.png', 'wb') as f:
+        f.write(data)
+
 
-    for s in min_dfa.states:
-        if s in min_dfa.final_states:
-            g.node(s, peripheries='2', style='filled', fillcolor='lightblue')
-        else:
-            g.node(s)
+def _draw_one(kind, source, filename):
+    err, = draw_all([(kind, source, filename)])
+    if err is not None:
+        raise err
 
-    g.node('start', shape='point')
-    g.edge('start', min_dfa.start)
 
-    for s, transitions in min_dfa.transitions.items():
-        for sym, d in transitions.items():
-            g.edge(s, d, label=sym)
+def draw_nfa(nfa, filename='diagrams/nfa'):
+    _draw_one("NFA", nfa_dot(nfa), filename)
 
-    g.render(filename, cleanup=True)
-    print(f"Minimized DFA diagram saved as: {filename}.png")
+
+def draw_dfa(dfa, filename='diagrams/dfa'):
+    _draw_one("DFA", dfa_dot(dfa), filename)
+
+
+def draw_min_dfa(min_dfa, filename='diagrams/min_dfa'):
+    _draw_one("Minimized DFA", min_dfa_dot(min_dfa), filename)
+
+
+def draw_all(jobs):
+    """Render (kind, source, filename) jobs concurrently.
+
+    source is DOT text or a zero-argument callable returning it, so callers
+    can defer building the text until a render is really needed.
+    Returns one entry per job: None if it rendered (or graphviz is missing),
+    otherwise the exception it failed with, so one bad diagram does not hide the rest.
+    """
+    if Source is None:
+        for kind, _, _ in jobs:
+            print(f"Graphviz not installed. Skipping {kind} diagram.")
+        return [None] * len(jobs)
+
+    def build(src):
+        return src() if callable(src) else src
+
+    # dot is a subprocess, so the threads mostly wait outside the GIL
+    with ThreadPoolExecutor(max_workers=len(jobs) or 1) as ex:
+        futures = [ex.submit(lambda s=src, f=filename: render_png(build(s), f)) for _, src, filename in jobs]
+    errors = []
+    for (kind, _, filename), fut in zip(jobs, futures):
+        err = fut.exception()
+        if err is None:
+            print(f"{kind} diagram saved as: {filename}.png")
+        errors.append(err)
+    return errors